@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+LLMRouter 测试：用本地 http.server 假扮 OpenAI 兼容端点，验证故障转移、对冲和全部失败
+运行：python -m pytest -q test_llm_router.py
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import update_news_deepseek as nexus
+
+
+class FakeEndpoint:
+    """假 /v1/chat/completions：固定延迟后返回 status，成功时回复 "ok from <name>" """
+
+    def __init__(self, name: str, delay: float = 0.0, status: int = 200):
+        self.name = name
+        self.delay = delay
+        self.status = status
+        self.calls = []
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                endpoint.calls.append(body)
+                time.sleep(endpoint.delay)
+                if endpoint.status == 200:
+                    payload = {
+                        "id": "x", "object": "chat.completion", "created": 0, "model": body["model"],
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": f"ok from {endpoint.name}"}}],
+                        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                    }
+                else:
+                    payload = {"error": {"message": "boom"}}
+                data = json.dumps(payload).encode()
+                try:
+                    self.send_response(endpoint.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except BrokenPipeError:
+                    pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def config(self):
+        return {
+            "name": self.name,
+            "base_url": f"http://127.0.0.1:{self.server.server_port}/v1",
+            "api_key": "test",
+            "model": f"{self.name}-model",
+            "cheap_model": f"{self.name}-cheap",
+        }
+
+
+@pytest.fixture
+def endpoints():
+    servers = []
+
+    def make(name, **kwargs):
+        server = FakeEndpoint(name, **kwargs)
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.server.shutdown()
+        server.server.server_close()
+
+
+@pytest.fixture
+def health(tmp_path):
+    return nexus.SourceHealth(str(tmp_path / "source_health.json"))
+
+
+def make_router(health, *servers):
+    return nexus.LLMRouter([s.config() for s in servers], health, hedge=True, timeout=5)
+
+
+def seed_latency(health, server, latency, n=5):
+    for _ in range(n):
+        health.record_success(f"llm:{server.name}", latency)
+
+
+def test_failover_to_next_endpoint(endpoints, health):
+    broken = endpoints("broken", status=500)
+    backup = endpoints("backup")
+    seed_latency(health, broken, 0.05)
+    seed_latency(health, backup, 1.0)
+
+    reply = make_router(health, broken, backup).chat([{"role": "user", "content": "hi"}])
+
+    assert reply == "ok from backup"
+    assert len(broken.calls) == 1 and len(backup.calls) == 1
+    assert health.records["llm:broken"]["consecutive_failures"] == 1
+
+
+def test_hedge_slow_primary(endpoints, health, monkeypatch):
+    monkeypatch.setattr(nexus, "LLM_HEDGE_DELAY", 0.2)
+    slow = endpoints("slow", delay=2.0)
+    fast = endpoints("fast")
+
+    start = time.monotonic()
+    reply = make_router(health, slow, fast).chat([{"role": "user", "content": "hi"}])
+
+    assert reply == "ok from fast"
+    assert time.monotonic() - start < 1.5
+    assert len(slow.calls) == 1 and len(fast.calls) == 1
+
+
+def test_close_drops_late_hedge_loser(endpoints, health, monkeypatch):
+    # 落败请求在守护线程上继续跑；close 之后它的结果不再写进健康度
+    monkeypatch.setattr(nexus, "LLM_HEDGE_DELAY", 0.2)
+    slow = endpoints("slow", delay=1.0)
+    fast = endpoints("fast")
+    router = make_router(health, slow, fast)
+
+    assert router.chat([{"role": "user", "content": "hi"}]) == "ok from fast"
+    router.close()
+    time.sleep(1.5)
+
+    assert len(slow.calls) == 1
+    assert "llm:slow" not in health.records
+    assert "llm:fast" in health.records
+
+
+def test_failover_recomputes_hedge_deadline(endpoints, health):
+    # 主端点历史很快但这次直接失败；转移后的端点按自己的 p90 计时，不应立刻被对冲掉
+    broken = endpoints("broken", status=500)
+    steady = endpoints("steady", delay=0.5)
+    spare = endpoints("spare")
+    seed_latency(health, broken, 0.05)
+    seed_latency(health, steady, 2.0)
+    seed_latency(health, spare, 5.0)
+
+    reply = make_router(health, broken, steady, spare).chat([{"role": "user", "content": "hi"}])
+
+    assert reply == "ok from steady"
+    assert spare.calls == []
+
+
+def test_all_endpoints_failed(endpoints, health):
+    first = endpoints("first", status=500)
+    second = endpoints("second", status=503)
+
+    with pytest.raises(RuntimeError, match="all LLM endpoints failed"):
+        make_router(health, first, second).chat([{"role": "user", "content": "hi"}])
+
+    assert len(first.calls) == 1 and len(second.calls) == 1
+    assert health.records["llm:first"]["consecutive_failures"] == 1
+    assert health.records["llm:second"]["consecutive_failures"] == 1
+
+
+def test_cheap_model_routing(endpoints, health):
+    server = endpoints("only")
+
+    make_router(health, server).chat([{"role": "user", "content": "hi"}], cheap=True)
+
+    assert server.calls[0]["model"] == "only-cheap"
+    assert "llm:only:cheap" in health.records
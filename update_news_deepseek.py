@@ -6,14 +6,20 @@ NexusIntel 新闻自动更新脚本 v2
 
 import os
 import json
+import copy
+import math
 import random
 import re
 import smtplib
+import threading
+import time
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime, timezone
+from functools import lru_cache
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Callable, Optional
 
 from openai import OpenAI
 
@@ -23,6 +29,18 @@ LLM_API_KEY = os.environ.get("LLM_API_KEY", "")
 LLM_BASE_URL = os.environ.get("LLM_BASE_URL", "https://bobdong.cn/v1")
 LLM_MODEL = os.environ.get("LLM_MODEL", "gpt-5.2")
 
+# 多端点路由：LLM_ENDPOINTS='[{"name": "bob", "base_url": "...", "api_key_env": "LLM_API_KEY", "model": "gpt-5.2"}, ...]'
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "180"))                 # 单次请求超时（秒）
+LLM_HEDGE = os.environ.get("LLM_HEDGE", "1") == "1"                       # 慢请求是否对冲到第二端点
+LLM_HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "90"))  # 超过主端点该延迟分位数即对冲
+LLM_HEDGE_DELAY = float(os.environ.get("LLM_HEDGE_DELAY", "90"))          # 无历史延迟时的对冲时限（秒）
+LLM_REPAIR_ROUNDS = int(os.environ.get("LLM_REPAIR_ROUNDS", "2"))         # 无效/缺失条目的定向重试轮数
+
+# 枢轴模式：只用 PIVOT_LANG 完整分析一次，其余语言只翻译文本字段（结构化字段共享）
+LLM_PIVOT = os.environ.get("LLM_PIVOT", "0") == "1"
+PIVOT_LANG = os.environ.get("PIVOT_LANG", "en")
+LLM_CHEAP_MODEL = os.environ.get("LLM_CHEAP_MODEL", "")                  # 翻译用的便宜模型（默认同主模型）
+
 # 新闻源 API
 GNEWS_API_KEY = os.environ.get("GNEWS_API_KEY", "")
 FINNHUB_API_KEY = os.environ.get("FINNHUB_API_KEY", "")
@@ -39,15 +57,25 @@ TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "")
 OUTPUT_PATH = "public/data.json"
 TARGET_COUNT = 15
 
-# 分类配置
-CATEGORIES = {
-    "macro": {"label": "宏观经济", "target": 3},
-    "tech": {"label": "科技", "target": 3},
-    "crypto": {"label": "加密货币", "target": 2},
-    "geopolitics": {"label": "地缘政治", "target": 2},
-    "china": {"label": "中国/亚太", "target": 3},
-    "market": {"label": "市场动态", "target": 2},
-}
+# 运行状态目录（源健康度等，跨运行持久化；Actions 中通过 cache 保留）
+STATE_DIR = os.environ.get("NEXUS_STATE_DIR", ".nexus_state")
+SOURCE_HEALTH_PATH = os.path.join(STATE_DIR, "source_health.json")
+RUNS_DIR = os.path.join(STATE_DIR, "runs")                     # 每次运行的阶段检查点
+RUNS_KEEP = 20                                                  # 保留最近 N 次运行
+
+# 抓取硬超时 / 熔断 / 对冲
+FEED_TIMEOUT = float(os.environ.get("FEED_TIMEOUT", "10"))      # 单个 RSS 总时限（秒）
+API_TIMEOUT = float(os.environ.get("API_TIMEOUT", "15"))        # GNews / Finnhub 总时限（秒）
+HEDGE_DELAY = float(os.environ.get("HEDGE_DELAY", "4"))         # 主源慢于此时间即拉起备用源
+CIRCUIT_FAILURE_THRESHOLD = 3                                   # 连续失败 N 次后熔断
+CIRCUIT_COOLDOWN = 6 * 3600                                     # 首次熔断冷却（秒），之后翻倍
+CIRCUIT_MAX_COOLDOWN = 72 * 3600
+
+# 源注册表（分类、RSS feed、GNews 查询均在 feeds.json 中维护，可用 --import-opml 批量导入）
+FEED_REGISTRY_PATH = os.environ.get("FEED_REGISTRY_PATH", "feeds.json")
+FEED_CACHE_PATH = os.path.join(STATE_DIR, "feed_cache.json")     # ETag / Last-Modified / 上次条目
+FEED_CONCURRENCY = int(os.environ.get("FEED_CONCURRENCY", "16"))  # 同时抓取的 feed 数上限
+FEED_OVERSAMPLE = 3                                              # 新条目达到 目标数 × N 即停止抓取
 
 # Unsplash 图片关键词池（按分类）
 IMAGE_KEYWORDS = {
@@ -60,202 +88,587 @@ IMAGE_KEYWORDS = {
 }
 
 
+# ============== 状态文件读写 ==============
+def load_json_file(path: str, default: Any) -> Any:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json_file(path: str, data: Any) -> None:
+    """先写临时文件再替换，中途崩溃也不会留下半个 JSON"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+# ============== 源健康度 + 熔断器 ==============
+def _redact_urls(text: str) -> str:
+    """去掉 URL 查询串：健康记录会进 Actions 缓存，不能带上凭据之类的参数"""
+    return re.sub(r"\?[^\s'\")]*", "?…", text)
+
+
+class SourceHealth:
+    """每个源的持久化健康记录：成功率、延迟分位数、最近错误、熔断状态"""
+    WINDOW = 50  # 保留最近 N 次延迟样本
+
+    def __init__(self, path: str = SOURCE_HEALTH_PATH):
+        self.path = path
+        self.records: Dict[str, Dict[str, Any]] = load_json_file(path, {})
+        self._lock = threading.Lock()
+
+    def save(self) -> None:
+        with self._lock:
+            save_json_file(self.path, self.records)
+
+    def _record(self, key: str) -> Dict[str, Any]:
+        return self.records.setdefault(key, {
+            "success": 0,
+            "failure": 0,
+            "consecutive_failures": 0,
+            "latencies": [],
+            "last_error": "",
+            "last_error_at": None,
+            "last_success_at": None,
+            "open_until": 0,
+        })
+
+    def allow(self, key: str) -> bool:
+        """熔断关闭或冷却期已过（半开，放行一次试探）时返回 True"""
+        rec = self.records.get(key)
+        return rec is None or time.time() >= rec.get("open_until", 0)
+
+    def record_success(self, key: str, latency: float) -> None:
+        with self._lock:
+            rec = self._record(key)
+            rec["success"] += 1
+            rec["consecutive_failures"] = 0
+            rec["open_until"] = 0
+            rec["last_success_at"] = datetime.now(timezone.utc).isoformat()
+            rec["latencies"] = (rec["latencies"] + [round(latency, 3)])[-self.WINDOW:]
+
+    def record_failure(self, key: str, error: Any, latency: float) -> None:
+        with self._lock:
+            rec = self._record(key)
+            rec["failure"] += 1
+            rec["consecutive_failures"] += 1
+            rec["last_error"] = _redact_urls(str(error))[:200]
+            rec["last_error_at"] = datetime.now(timezone.utc).isoformat()
+            rec["latencies"] = (rec["latencies"] + [round(latency, 3)])[-self.WINDOW:]
+            over = rec["consecutive_failures"] - CIRCUIT_FAILURE_THRESHOLD
+            if over >= 0:
+                cooldown = min(CIRCUIT_COOLDOWN * (2 ** over), CIRCUIT_MAX_COOLDOWN)
+                rec["open_until"] = time.time() + cooldown
+                print(f"  ⛔ 熔断 {key[:60]}（连续失败 {rec['consecutive_failures']} 次，冷却 {cooldown / 3600:.0f}h）")
+
+    def success_rate(self, key: str) -> float:
+        rec = self.records.get(key)
+        if not rec:
+            return 1.0
+        # 平滑：新源视为健康，一次失败不至于被判死
+        return (rec["success"] + 1) / (rec["success"] + rec["failure"] + 1)
+
+    def percentile(self, key: str, q: float, default: float) -> float:
+        rec = self.records.get(key)
+        samples = sorted(rec["latencies"]) if rec else []
+        if not samples:
+            return default
+        idx = min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))
+        return samples[idx]
+
+    def stats(self, key: str) -> Dict[str, Any]:
+        rec = self.records.get(key, {})
+        return {
+            "success_rate": round(self.success_rate(key), 3),
+            "p50": self.percentile(key, 50, 0.0),
+            "p95": self.percentile(key, 95, 0.0),
+            "last_error": rec.get("last_error", ""),
+            "open": not self.allow(key),
+        }
+
+    def expected_cost(self, key: str, failure_cost: float = FEED_TIMEOUT) -> float:
+        """期望耗时：p50 + 失败率 × 失败代价"""
+        return self.percentile(key, 50, 0.0) + (1 - self.success_rate(key)) * failure_cost
+
+    def rank(self, keys: List[str], failure_cost: float = FEED_TIMEOUT) -> List[str]:
+        """按期望耗时排序（稳定排序，同分保留配置顺序）"""
+        return sorted(keys, key=lambda k: self.expected_cost(k, failure_cost))
+
+    def open_circuits(self) -> List[str]:
+        # 被放弃的抓取线程可能仍在写入新记录，遍历时加锁
+        with self._lock:
+            return [k for k in self.records if not self.allow(k)]
+
+    def degraded(self) -> List[str]:
+        """未熔断但最近连续失败的源"""
+        with self._lock:
+            return [k for k, rec in self.records.items() if rec["consecutive_failures"] and self.allow(k)]
+
+
+def _http_fetch_blocking(url: str, deadline: float, params: Dict[str, Any],
+                         headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+    start = time.monotonic()
+    with requests.get(url, params=params, stream=True, timeout=(min(5.0, deadline), deadline),
+                      headers={"User-Agent": "NexusIntel/2.0 (+https://github.com/wang2-lat/nexusintel)",
+                               **(headers or {})}) as resp:
+        if resp.status_code == 304:
+            return 304, resp.headers, b""
+        resp.raise_for_status()
+        chunks = []
+        for chunk in resp.iter_content(chunk_size=16384):
+            chunks.append(chunk)
+            if time.monotonic() - start > deadline:
+                raise TimeoutError(f"exceeded {deadline:.0f}s deadline")
+        return resp.status_code, resp.headers, b"".join(chunks)
+
+
+def http_fetch(url: str, deadline: float, params: Dict[str, Any] = None,
+               headers: Dict[str, str] = None) -> Tuple[int, Dict[str, str], bytes]:
+    """带总时限的 GET，返回 (状态码, 响应头, 正文)
+
+    requests 的读超时每收到一次数据就重置，慢速滴流的源可以远超时限；这里把请求放进守护线程，
+    调用方按墙钟最多等 deadline 秒，超时即抛 TimeoutError。被放弃的线程是守护线程，不会拖住进程退出，
+    且每次读最多阻塞 deadline 秒、每个分块后自检时限，很快自行结束
+    （不在这里 close 响应：它要等读线程释放缓冲区锁，会把调用方一起卡住）
+    """
+    outcome: Dict[str, Any] = {}
+    finished = threading.Event()
+
+    def worker() -> None:
+        try:
+            outcome["result"] = _http_fetch_blocking(url, deadline, params, headers)
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            finished.set()
+
+    threading.Thread(target=worker, daemon=True).start()
+    if not finished.wait(deadline):
+        raise TimeoutError(f"exceeded {deadline:.0f}s deadline")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def http_get(url: str, deadline: float, params: Dict[str, Any] = None,
+             headers: Dict[str, str] = None) -> bytes:
+    return http_fetch(url, deadline, params, headers)[2]
+
+
+# ============== 源注册表 + 条件请求缓存 ==============
+class FeedRegistry:
+    """文件化的源注册表（feeds.json）：分类配置 + RSS feed 元数据，首次访问时加载并按分类建索引
+
+    每个 feed：url, category, lang, weight（排序权重）, poll_interval（分钟，未到间隔直接用缓存）,
+    backup（备用源，仅对冲时拉取）, parser（max_entries / description_field / strip_html / source_name）
+    """
+    FEED_DEFAULTS = {"lang": None, "weight": 1.0, "poll_interval": 0, "backup": False}
+    PARSER_DEFAULTS = {"max_entries": 3, "description_field": None, "strip_html": True, "source_name": None}
+
+    def __init__(self, path: str = FEED_REGISTRY_PATH):
+        self.path = path
+        self._data: Dict[str, Any] = None
+        self._by_category: Dict[str, List[Dict[str, Any]]] = None
+
+    def _load(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = load_json_file(self.path, {})
+            # 缺少的键补成空值，手写或半成品的 feeds.json 也能加载（add_feed / save 依赖这两个键）
+            self._data.setdefault("categories", {})
+            self._data.setdefault("feeds", [])
+            if not self._data["categories"]:
+                print(f"⚠️  源注册表 {self.path} 为空或不存在")
+            self._by_category = {}
+            for raw in self._data["feeds"]:
+                self._index(raw)
+        return self._data
+
+    def _index(self, raw: Dict[str, Any]) -> None:
+        cat_cfg = self._data["categories"].get(raw["category"], {})
+        feed = {**self.FEED_DEFAULTS, **raw, "parser": {**self.PARSER_DEFAULTS, **raw.get("parser", {})}}
+        feed["lang"] = feed["lang"] or cat_cfg.get("lang", "en")
+        self._by_category.setdefault(raw["category"], []).append(feed)
+
+    @property
+    def categories(self) -> Dict[str, Dict[str, Any]]:
+        return self._load()["categories"]
+
+    def feeds(self, category: str, backup: bool = False) -> List[Dict[str, Any]]:
+        self._load()
+        return [f for f in self._by_category.get(category, []) if f["backup"] == backup]
+
+    def urls(self) -> List[str]:
+        return [f["url"] for f in self._load()["feeds"]]
+
+    def add_feed(self, raw: Dict[str, Any]) -> bool:
+        data = self._load()
+        if raw["category"] not in data["categories"]:
+            raise ValueError(f"unknown category: {raw['category']}")
+        if raw["url"] in set(self.urls()):
+            return False
+        data["feeds"].append(raw)
+        self._index(raw)
+        return True
+
+    def save(self) -> None:
+        save_json_file(self.path, self._load())
+
+    def _match_category(self, name: str) -> str:
+        name = (name or "").strip().strip("/").split("/")[-1].strip().lower()
+        for key, cfg in self.categories.items():
+            if name in (key.lower(), cfg.get("label", "").lower()):
+                return key
+        return None
+
+    def import_opml(self, path: str, category: str = None) -> int:
+        """导入 OPML：分类取 --category，否则取 outline 的 category 属性或所在文件夹名（匹配分类 key / label）"""
+        import xml.etree.ElementTree as ET
+
+        if category and category not in self.categories:
+            print(f"❌ 未知分类: {category}（可选: {', '.join(self.categories)}）")
+            return 0
+        body = ET.parse(path).getroot().find("body")
+        added, skipped = 0, 0
+
+        def walk(node, folder: str) -> None:
+            nonlocal added, skipped
+            for outline in node.findall("outline"):
+                url = outline.get("xmlUrl")
+                if not url:
+                    walk(outline, outline.get("title") or outline.get("text") or folder)
+                    continue
+                cat = (category
+                       or self._match_category((outline.get("category") or "").split(",")[0])
+                       or self._match_category(folder))
+                if not cat:
+                    skipped += 1
+                    print(f"  ⚠️  无法确定分类，跳过 {url}")
+                    continue
+                raw = {"url": url, "category": cat, "weight": 1.0}
+                title = outline.get("title") or outline.get("text")
+                if title:
+                    raw["title"] = title
+                if outline.get("language"):
+                    raw["lang"] = outline.get("language")
+                if self.add_feed(raw):
+                    added += 1
+
+        if body is not None:
+            walk(body, "")
+        print(f"📥 OPML 导入: 新增 {added} 个源，跳过 {skipped} 个")
+        return added
+
+
+class FeedCache:
+    """RSS 条件请求缓存：ETag / Last-Modified、上次轮询时间、上次解析出的条目"""
+
+    def __init__(self, path: str = FEED_CACHE_PATH):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = load_json_file(path, {})
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Dict[str, Any]:
+        return self.entries.get(url, {})
+
+    def due(self, url: str, poll_interval: float) -> bool:
+        return time.time() - self.get(url).get("polled_at", 0) >= poll_interval * 60
+
+    def store(self, url: str, articles: List[Dict[str, str]] = None, etag: str = None,
+              last_modified: str = None) -> None:
+        """articles 为 None 表示 304 未变化，只刷新轮询时间"""
+        with self._lock:
+            entry = self.entries.setdefault(url, {})
+            entry["polled_at"] = time.time()
+            if articles is not None:
+                entry.update(articles=articles, etag=etag, last_modified=last_modified)
+
+    def prune(self, urls: List[str]) -> None:
+        keep = set(urls)
+        with self._lock:
+            self.entries = {u: e for u, e in self.entries.items() if u in keep}
+
+    def save(self) -> None:
+        with self._lock:
+            save_json_file(self.path, self.entries)
+
+
 # ============== 新闻源：GNews API ==============
 class GNewsSource:
     """GNews API - 免费层 100 req/day，支持多语言"""
     BASE_URL = "https://gnews.io/api/v4"
+    HEALTH_KEY = "api:gnews"
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, health: SourceHealth):
         self.api_key = api_key
+        self.health = health
 
-    def search(self, query: str, lang: str = "en", max_results: int = 5) -> List[Dict[str, str]]:
+    def _get(self, endpoint: str, params: Dict[str, Any], label: str) -> List[Dict[str, str]]:
         if not self.api_key:
             return []
+        if not self.health.allow(self.HEALTH_KEY):
+            print(f"  [GNews] 熔断中，跳过 {label}")
+            return []
+        start = time.monotonic()
         try:
-            resp = requests.get(f"{self.BASE_URL}/search", params={
-                "q": query, "lang": lang, "max": max_results, "apikey": self.api_key,
-            }, timeout=15)
-            resp.raise_for_status()
-            return [
+            # 密钥走请求头：放在查询串里会随异常信息进日志和健康记录
+            data = json.loads(http_get(f"{self.BASE_URL}/{endpoint}", API_TIMEOUT, params=params,
+                                       headers={"X-Api-Key": self.api_key}))
+            articles = [
                 {
                     "title": a["title"],
                     "description": a.get("description", ""),
                     "url": a["url"],
                     "source": a.get("source", {}).get("name", "GNews"),
                 }
-                for a in resp.json().get("articles", [])
+                for a in data.get("articles", [])
             ]
         except Exception as e:
-            print(f"  [GNews] search '{query}' failed: {e}")
+            self.health.record_failure(self.HEALTH_KEY, e, time.monotonic() - start)
+            print(f"  [GNews] {label} failed: {e}")
             return []
+        self.health.record_success(self.HEALTH_KEY, time.monotonic() - start)
+        return articles
+
+    def search(self, query: str, lang: str = "en", max_results: int = 5) -> List[Dict[str, str]]:
+        return self._get("search", {"q": query, "lang": lang, "max": max_results}, f"search '{query}'")
 
     def top_headlines(self, category: str = "general", lang: str = "en", max_results: int = 5) -> List[Dict[str, str]]:
-        if not self.api_key:
-            return []
-        try:
-            resp = requests.get(f"{self.BASE_URL}/top-headlines", params={
-                "category": category, "lang": lang, "max": max_results, "apikey": self.api_key,
-            }, timeout=15)
-            resp.raise_for_status()
-            return [
-                {
-                    "title": a["title"],
-                    "description": a.get("description", ""),
-                    "url": a["url"],
-                    "source": a.get("source", {}).get("name", "GNews"),
-                }
-                for a in resp.json().get("articles", [])
-            ]
-        except Exception as e:
-            print(f"  [GNews] top_headlines '{category}' failed: {e}")
-            return []
+        return self._get("top-headlines", {"category": category, "lang": lang, "max": max_results},
+                         f"top_headlines '{category}'")
 
 
 # ============== 新闻源：Finnhub（金融新闻）==============
 class FinnhubSource:
     """Finnhub API - 免费层 60 req/min"""
     BASE_URL = "https://finnhub.io/api/v1"
+    HEALTH_KEY = "api:finnhub"
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, health: SourceHealth):
         self.api_key = api_key
+        self.health = health
 
     def general_news(self, category: str = "general") -> List[Dict[str, str]]:
         if not self.api_key:
             return []
+        if not self.health.allow(self.HEALTH_KEY):
+            print("  [Finnhub] 熔断中，跳过")
+            return []
+        start = time.monotonic()
         try:
-            resp = requests.get(f"{self.BASE_URL}/news", params={
-                "category": category, "token": self.api_key,
-            }, timeout=15)
-            resp.raise_for_status()
-            return [
+            data = json.loads(http_get(f"{self.BASE_URL}/news", API_TIMEOUT, params={"category": category},
+                                       headers={"X-Finnhub-Token": self.api_key}))
+            articles = [
                 {
                     "title": a["headline"],
                     "description": a.get("summary", "")[:300],
                     "url": a["url"],
                     "source": a.get("source", "Finnhub"),
                 }
-                for a in resp.json()[:10]
+                for a in data[:10]
             ]
         except Exception as e:
+            self.health.record_failure(self.HEALTH_KEY, e, time.monotonic() - start)
             print(f"  [Finnhub] failed: {e}")
             return []
+        self.health.record_success(self.HEALTH_KEY, time.monotonic() - start)
+        return articles
 
 
-# ============== 新闻源：可靠 RSS ==============
+# ============== 新闻源：RSS ==============
 class RSSSource:
-    """经过验证的免费 RSS 源"""
-
-    FEEDS = {
-        "macro": [
-            "https://feeds.bbci.co.uk/news/business/rss.xml",
-            "https://www.cnbc.com/id/20910258/device/rss/rss.html",
-        ],
-        "tech": [
-            "https://techcrunch.com/feed/",
-            "https://feeds.arstechnica.com/arstechnica/technology-lab",
-            "https://www.theverge.com/rss/index.xml",
-        ],
-        "crypto": [
-            "https://cointelegraph.com/rss",
-            "https://decrypt.co/feed",
-        ],
-        "geopolitics": [
-            "https://feeds.bbci.co.uk/news/world/rss.xml",
-            "https://rss.nytimes.com/services/xml/rss/nyt/World.xml",
-        ],
-        "china": [
-            "https://www.36kr.com/feed",
-            "https://rsshub.app/36kr/newsflashes",
-            "https://rsshub.app/cls/telegraph",
-            "https://rsshub.app/wallstreetcn/live/global",
-        ],
-        "market": [
-            "https://feeds.finance.yahoo.com/rss/2.0/headline?s=^GSPC&region=US&lang=en-US",
-        ],
-    }
+    """注册表中的 RSS 源；硬超时 + 熔断 + 条件请求，主源慢时对冲备用源"""
+
+    def __init__(self, registry: FeedRegistry, health: SourceHealth, cache: FeedCache):
+        self.registry = registry
+        self.health = health
+        self.cache = cache
+
+    def _parse_feed(self, feed: Dict[str, Any]) -> Tuple[List[Dict[str, str]], bool]:
+        """返回 (条目, 是否有更新)；304 未变化时返回缓存条目"""
+        import feedparser
+
+        url, hints = feed["url"], feed["parser"]
+        cached = self.cache.get(url)
+        headers = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        status, resp_headers, body = http_fetch(url, FEED_TIMEOUT, headers=headers)
+        if status == 304:
+            self.cache.store(url)
+            return cached.get("articles", []), False
+
+        parsed = feedparser.parse(body)
+        if parsed.bozo and not parsed.entries:
+            raise ValueError(f"unparseable feed: {parsed.get('bozo_exception', '')}")
 
-    @staticmethod
-    def fetch(category: str, max_per_feed: int = 3) -> List[Dict[str, str]]:
+        articles = []
+        for entry in parsed.entries[:hints["max_entries"]]:
+            title = entry.get("title", "")
+            if not title:
+                continue
+            field = hints["description_field"]
+            desc = entry.get(field, "") if field else entry.get("summary", entry.get("description", ""))
+            if hints["strip_html"]:
+                desc = re.sub(r"<[^>]+>", "", desc)
+            articles.append({
+                "title": title,
+                "description": desc[:300],
+                "url": entry.get("link", ""),
+                "source": hints["source_name"] or parsed.feed.get("title", url.split("/")[2]),
+            })
+        self.cache.store(url, articles, resp_headers.get("ETag"), resp_headers.get("Last-Modified"))
+        return articles, True
+
+    def _poll(self, feed: Dict[str, Any]) -> Tuple[List[Dict[str, str]], bool]:
+        # 在工作线程内自行记录健康度：被放弃的慢请求结束后也会如实记账
+        key = f"rss:{feed['url']}"
+        start = time.monotonic()
+        try:
+            result = self._parse_feed(feed)
+        except Exception as e:
+            self.health.record_failure(key, e, time.monotonic() - start)
+            print(f"  [RSS] {feed['url'][:50]}... failed: {e}")
+            return [], False
+        self.health.record_success(key, time.monotonic() - start)
+        return result
+
+    def _usable(self, feeds: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """去掉熔断中的源；按 期望耗时 / 权重 排序，同分时权重高的在前"""
+        usable = []
+        for feed in feeds:
+            if self.health.allow(f"rss:{feed['url']}"):
+                usable.append(feed)
+            else:
+                print(f"  [RSS] 熔断中，跳过 {feed['url'][:50]}...")
+        return sorted(usable, key=lambda f: (self.health.expected_cost(f"rss:{f['url']}") / max(f["weight"], 0.01),
+                                             -f["weight"]))
+
+    def fetch(self, category: str, want: int) -> List[Dict[str, str]]:
         try:
-            import feedparser
+            import feedparser  # noqa: F401
         except ImportError:
             print("  [RSS] feedparser not installed")
             return []
 
-        feeds = RSSSource.FEEDS.get(category, [])
-        articles = []
-
-        for feed_url in feeds:
-            try:
-                feed = feedparser.parse(feed_url)
-                for entry in feed.entries[:max_per_feed]:
-                    title = entry.get("title", "")
-                    if not title:
-                        continue
-                    desc = entry.get("summary", entry.get("description", ""))
-                    desc = re.sub(r"<[^>]+>", "", desc)[:300]
-                    articles.append({
-                        "title": title,
-                        "description": desc,
-                        "url": entry.get("link", ""),
-                        "source": feed.feed.get("title", feed_url.split("/")[2]),
-                    })
-            except Exception as e:
-                print(f"  [RSS] {feed_url[:50]}... failed: {e}")
-                continue
-
-        return articles
+        primaries = self._usable(self.registry.feeds(category))
+        backups = self._usable(self.registry.feeds(category, backup=True))
+        if not primaries:
+            primaries, backups = backups, []
+
+        # (是否新抓取, 权重, 条目)；未到轮询间隔的源直接用缓存，不发请求
+        results: List[Any] = []
+        due = []
+        for feed in primaries:
+            if self.cache.due(feed["url"], feed["poll_interval"]):
+                due.append(feed)
+            else:
+                results.append((False, feed["weight"], self.cache.get(feed["url"]).get("articles", [])))
+
+        def enough() -> bool:
+            return sum(len(r[2]) for r in results if r[0]) >= want * FEED_OVERSAMPLE
+
+        if due:
+            # 对冲时机：主源历史 p95 延迟（无历史时用 HEDGE_DELAY），上限 HEDGE_DELAY
+            hedge_after = min(HEDGE_DELAY, max(self.health.percentile(f"rss:{f['url']}", 95, HEDGE_DELAY)
+                                               for f in due))
+            pool = ThreadPoolExecutor(max_workers=min(FEED_CONCURRENCY, len(due) + len(backups)))
+            start = time.monotonic()
+            # 并发上限内按批次计时限，源再多也不会把排队中的源误判为超时
+            deadline = start + FEED_TIMEOUT * math.ceil(len(due) / FEED_CONCURRENCY)
+            futures = {pool.submit(self._poll, f): f for f in due}
+            pending = set(futures)
+            hedged = not backups
+
+            while pending and time.monotonic() < deadline and not enough():
+                next_event = deadline if hedged else min(deadline, start + hedge_after)
+                done, pending = wait(pending, timeout=max(0.0, next_event - time.monotonic()),
+                                     return_when=FIRST_COMPLETED)
+                for fut in done:
+                    articles, fresh = fut.result()
+                    if articles:
+                        results.append((fresh, futures[fut]["weight"], articles))
+
+                collected = sum(len(r[2]) for r in results)
+                slow = pending and time.monotonic() - start >= hedge_after and not enough()
+                short = not pending and collected < want
+                if not hedged and (slow or short):
+                    hedged = True
+                    print(f"  [RSS] 主源{'过慢' if slow else '不足'}，对冲 {len(backups)} 个备用源")
+                    deadline = max(deadline, time.monotonic() + FEED_TIMEOUT)
+                    for feed in backups:
+                        fut = pool.submit(self._poll, feed)
+                        futures[fut] = feed
+                        pending.add(fut)
+
+            # 排队未开始的直接取消；已在跑的由 http_fetch 自身时限收尾
+            abandoned = [fut for fut in pending if not fut.cancel()]
+            if abandoned and not enough():
+                print(f"  [RSS] {len(abandoned)} 个源超时放弃")
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        # 新抓取的优先，其次按权重
+        results.sort(key=lambda r: (not r[0], -r[1]))
+        return [a for r in results for a in r[2]]
 
 
 # ============== 多源聚合器 ==============
 class NewsAggregator:
-    """聚合多个新闻源，按分类抓取，去重"""
-
-    GNEWS_QUERIES = {
-        "macro": ["inflation economy 2026", "federal reserve interest rate", "GDP growth recession"],
-        "tech": ["artificial intelligence breakthrough", "semiconductor shortage", "tech IPO 2026"],
-        "crypto": ["bitcoin ethereum price", "crypto regulation SEC"],
-        "geopolitics": ["war conflict sanctions", "trade war tariff"],
-        "china": ["中国经济 政策", "科技公司 监管"],
-        "market": ["stock market rally crash", "earnings report surprise"],
-    }
-
-    def __init__(self):
-        self.gnews = GNewsSource(GNEWS_API_KEY)
-        self.finnhub = FinnhubSource(FINNHUB_API_KEY)
+    """聚合多个新闻源，按注册表分类抓取，去重"""
+
+    def __init__(self, health: SourceHealth, registry: FeedRegistry):
+        self.health = health
+        self.registry = registry
+        self.cache = FeedCache()
+        self.rss = RSSSource(registry, health, self.cache)
+        self.gnews = GNewsSource(GNEWS_API_KEY, health)
+        self.finnhub = FinnhubSource(FINNHUB_API_KEY, health)
         self.seen_titles: set = set()
 
+    @staticmethod
+    def _title_key(article: Dict[str, str]) -> str:
+        return article["title"].lower().strip()[:60]
+
+    def _count_new(self, articles: List[Dict[str, str]]) -> int:
+        return len({self._title_key(a) for a in articles} - self.seen_titles)
+
     def _dedup(self, articles: List[Dict[str, str]]) -> List[Dict[str, str]]:
         result = []
         for a in articles:
-            key = a["title"].lower().strip()[:60]
+            key = self._title_key(a)
             if key not in self.seen_titles:
                 self.seen_titles.add(key)
                 result.append(a)
         return result
 
     def fetch_category(self, category: str, target: int) -> List[Dict[str, str]]:
+        cfg = self.registry.categories.get(category, {})
         all_articles: List[Dict[str, str]] = []
 
         # 1. RSS（免费无限量）
         print(f"  [{category}] RSS...")
-        rss = RSSSource.fetch(category)
+        rss = self.rss.fetch(category, target)
         all_articles.extend(rss)
         print(f"  [{category}] RSS: {len(rss)} 条")
 
         # 2. GNews API（如配置了）
-        if GNEWS_API_KEY and len(self._dedup(list(all_articles))) < target:
-            queries = self.GNEWS_QUERIES.get(category, [])
+        if GNEWS_API_KEY and self._count_new(all_articles) < target:
+            queries = cfg.get("gnews_queries", [])
             if queries:
                 query = random.choice(queries)
-                lang = "zh" if category == "china" else "en"
                 print(f"  [{category}] GNews: '{query}'...")
-                gnews = self.gnews.search(query, lang=lang, max_results=3)
+                gnews = self.gnews.search(query, lang=cfg.get("lang", "en"), max_results=3)
                 all_articles.extend(gnews)
                 print(f"  [{category}] GNews: {len(gnews)} 条")
 
-        # 3. Finnhub（仅金融类）
-        if FINNHUB_API_KEY and category in ("macro", "market") and len(self._dedup(list(all_articles))) < target:
+        # 3. Finnhub（仅注册表中标记的金融类）
+        if FINNHUB_API_KEY and cfg.get("finnhub") and self._count_new(all_articles) < target:
             print(f"  [{category}] Finnhub...")
             fh = self.finnhub.general_news()
             all_articles.extend(fh)
@@ -266,7 +679,7 @@ class NewsAggregator:
 
     def fetch_all(self) -> List[Dict[str, Any]]:
         result = []
-        for cat, cfg in CATEGORIES.items():
+        for cat, cfg in self.registry.categories.items():
             print(f"\n📰 [{cfg['label']}]")
             articles = self.fetch_category(cat, cfg["target"])
             for a in articles:
@@ -276,75 +689,474 @@ class NewsAggregator:
             print(f"  => {len(articles)} 条")
 
         print(f"\n📊 总计: {len(result)} 条新闻")
+        for label, keys in (("⛔ 熔断中的源", self.health.open_circuits()), ("⚠️  降级的源", self.health.degraded())):
+            if keys:
+                print(f"{label} {len(keys)} 个:")
+            for key in keys:
+                st = self.health.stats(key)
+                print(f"   {key[:60]} | 成功率 {st['success_rate']:.0%} | p50 {st['p50']:.1f}s p95 {st['p95']:.1f}s"
+                      f" | {st['last_error'][:80]}")
+        self.health.save()
+        self.cache.prune(self.registry.urls())
+        self.cache.save()
         return result
 
 
+# ============== LLM 路由（多端点 OpenAI 兼容）==============
+def load_llm_endpoints() -> List[Dict[str, str]]:
+    """LLM_ENDPOINTS 为 JSON 数组；未配置时退化为 LLM_API_KEY/LLM_BASE_URL/LLM_MODEL 单端点"""
+    raw = os.environ.get("LLM_ENDPOINTS", "").strip()
+    if not raw:
+        return [{"name": "default", "base_url": LLM_BASE_URL, "api_key": LLM_API_KEY, "model": LLM_MODEL,
+                 "cheap_model": LLM_CHEAP_MODEL or LLM_MODEL}]
+
+    endpoints = []
+    for i, ep in enumerate(json.loads(raw)):
+        # 只有完全没写密钥来源的条目才用 LLM_API_KEY；api_key_env 写错/未设置时留空，
+        # 由 run_analyze 剔除，避免把主服务商的密钥发给别家 base_url
+        if "api_key" in ep or "api_key_env" in ep:
+            api_key = ep.get("api_key") or os.environ.get(ep.get("api_key_env") or "", "")
+        else:
+            api_key = LLM_API_KEY
+        endpoints.append({
+            "name": ep.get("name") or f"endpoint-{i}",
+            "base_url": ep["base_url"],
+            "api_key": api_key,
+            "model": ep.get("model") or LLM_MODEL,
+            "cheap_model": ep.get("cheap_model") or LLM_CHEAP_MODEL or ep.get("model") or LLM_MODEL,
+        })
+    return endpoints
+
+
+class LLMRouter:
+    """按滚动延迟/错误率把请求发往最快的健康端点；超过分位数时限对冲第二端点，出错故障转移"""
+
+    def __init__(self, endpoints: List[Dict[str, str]], health: SourceHealth,
+                 hedge: bool = LLM_HEDGE, timeout: float = LLM_TIMEOUT):
+        self.endpoints = endpoints
+        self.health = health
+        self.hedge = hedge
+        self.clients = {
+            ep["name"]: OpenAI(api_key=ep["api_key"], base_url=ep["base_url"], timeout=timeout, max_retries=0)
+            for ep in endpoints
+        }
+        self._closed = False
+
+    @staticmethod
+    def _key(ep: Dict[str, str], cheap: bool = False) -> str:
+        # 便宜模型单独统计延迟，避免和完整分析的延迟分布混在一起
+        return f"llm:{ep['name']}:cheap" if cheap else f"llm:{ep['name']}"
+
+    def describe(self) -> str:
+        return ", ".join(f"{ep['name']}/{ep['model']}" for ep in self.endpoints)
+
+    def ranked(self, cheap: bool = False) -> List[Dict[str, str]]:
+        """健康端点按速度排序；全部熔断时仍全部尝试，总好过整段分析失败"""
+        by_key = {self._key(ep, cheap): ep for ep in self.endpoints}
+        usable = [k for k in by_key if self.health.allow(k)] or list(by_key)
+        return [by_key[k] for k in self.health.rank(usable, failure_cost=LLM_TIMEOUT)]
+
+    def _call(self, ep: Dict[str, str], messages: List[Dict[str, str]], params: Dict[str, Any],
+              cheap: bool) -> str:
+        key = self._key(ep, cheap)
+        start = time.monotonic()
+        try:
+            response = self.clients[ep["name"]].chat.completions.create(
+                model=ep["cheap_model"] if cheap else ep["model"], messages=messages, **params,
+            )
+            content = response.choices[0].message.content
+            if not content:
+                raise ValueError("empty completion")
+        except Exception as e:
+            if not self._closed:
+                self.health.record_failure(key, e, time.monotonic() - start)
+            raise
+        if not self._closed:
+            self.health.record_success(key, time.monotonic() - start)
+        return content
+
+    def _submit(self, ep: Dict[str, str], messages: List[Dict[str, str]], params: Dict[str, Any],
+                cheap: bool) -> Future:
+        # 守护线程而非线程池：对冲落败的请求不必等完，也不会拖住进程退出（同 http_fetch）
+        fut: Future = Future()
+
+        def run() -> None:
+            try:
+                fut.set_result(self._call(ep, messages, params, cheap))
+            except Exception as e:
+                fut.set_exception(e)
+
+        threading.Thread(target=run, daemon=True).start()
+        return fut
+
+    def close(self) -> None:
+        """放弃仍在途的对冲落败请求；之后到达的结果不再计入健康度（调用方随即 save）"""
+        self._closed = True
+
+    def chat(self, messages: List[Dict[str, str]], cheap: bool = False, **params) -> str:
+        candidates = self.ranked(cheap)
+        pending: Dict[Any, Dict[str, str]] = {}
+        errors = []
+
+        primary, hedge_at, hedged = None, 0.0, True
+
+        def launch() -> None:
+            # 无请求在途时（首发或故障转移）新端点成为主请求，对冲时限按它自己的延迟分布重算
+            nonlocal primary, hedge_at, hedged
+            ep = candidates.pop(0)
+            if not pending:
+                primary = ep
+                hedge_after = self.health.percentile(self._key(ep, cheap), LLM_HEDGE_PERCENTILE, LLM_HEDGE_DELAY)
+                hedge_at = time.monotonic() + hedge_after
+                hedged = not (self.hedge and candidates)
+            pending[self._submit(ep, messages, params, cheap)] = ep
+
+        launch()
+
+        while pending:
+            timeout = None if hedged else max(0.0, hedge_at - time.monotonic())
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for fut in done:
+                ep = pending.pop(fut)
+                try:
+                    content = fut.result()
+                except Exception as e:
+                    errors.append(f"{ep['name']}: {e}")
+                    print(f"  ⚠️  {ep['name']} 失败: {str(e)[:120]}")
+                    # 无请求在途，或对冲请求失败，都补发下一个端点
+                    if candidates and (not pending or hedged):
+                        print(f"  ↪️  故障转移 → {candidates[0]['name']}")
+                        launch()
+                    continue
+                print(f"  🛰️  {ep['name']}/{ep['cheap_model'] if cheap else ep['model']} 响应")
+                return content
+
+            if not done and not hedged:
+                hedged = True
+                if candidates:
+                    print(f"  ⏱️  {primary['name']} 超过 p{LLM_HEDGE_PERCENTILE:.0f} 时限，对冲 → {candidates[0]['name']}")
+                    launch()
+
+        raise RuntimeError(f"all LLM endpoints failed: {'; '.join(errors)}")
+
+
+# ============== 情报条目校验 ==============
+# 与 prompt 中的约束保持一致；schema 在模块加载时编译成校验闭包，逐条复用
+def _v_str():
+    def check(value: Any, path: str) -> List[str]:
+        return [] if isinstance(value, str) and value.strip() else [f"{path} 应为非空字符串"]
+    return check
+
+
+def _v_enum(*choices: str):
+    def check(value: Any, path: str) -> List[str]:
+        return [] if value in choices else [f"{path}={value!r} 不在 {'|'.join(choices)}"]
+    return check
+
+
+def _v_range(lo: int, hi: int):
+    def check(value: Any, path: str) -> List[str]:
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool) and lo <= value <= hi
+        return [] if ok else [f"{path}={value!r} 不在 {lo}-{hi}"]
+    return check
+
+
+def _v_list(item_check, lo: int, hi: int):
+    def check(value: Any, path: str) -> List[str]:
+        if not isinstance(value, list):
+            return [f"{path} 应为数组"]
+        errors = [] if lo <= len(value) <= hi else [f"{path} 数量 {len(value)} 不在 {lo}-{hi}"]
+        for i, item in enumerate(value):
+            errors.extend(item_check(item, f"{path}[{i}]"))
+        return errors
+    return check
+
+
+def _v_object(fields: Dict[str, Any]):
+    def check(value: Any, path: str) -> List[str]:
+        if not isinstance(value, dict):
+            return [f"{path} 应为对象"]
+        errors = []
+        for name, field_check in fields.items():
+            if name not in value:
+                errors.append(f"{path}.{name} 缺失")
+            else:
+                errors.extend(field_check(value[name], f"{path}.{name}"))
+        return errors
+    return check
+
+
+validate_intel_item = _v_object({
+    "key": _v_str(),
+    "title": _v_str(),
+    "fullTitle": _v_str(),
+    "classification": _v_enum("TOP SECRET", "CONFIDENTIAL", "RESTRICTED", "UNCLASSIFIED"),
+    "impactLevel": _v_enum("CRITICAL", "HIGH", "MEDIUM", "INFO"),
+    "summary": _v_str(),
+    "relations": _v_list(_v_object({
+        "label": _v_str(),
+        "type": _v_enum("entity", "tech", "risk", "resource"),
+        "desc": _v_str(),
+    }), 3, 5),
+    "analysis": _v_object({"strategic": _v_list(_v_str(), 2, 2)}),
+    "investment": _v_object({
+        "action": _v_enum("LONG", "SHORT"),
+        "asset": _v_str(),
+        "risk": _v_enum("HIGH", "MEDIUM", "LOW"),
+        "thesis": _v_str(),
+    }),
+    "confidence": _v_range(80, 98),
+})
+
+
+@lru_cache(maxsize=None)
+def translation_validator(n_relations: int, n_strategic: int):
+    """译文只含文本字段，且数组长度必须与原条目一致（按形状缓存）"""
+    return _v_object({
+        "key": _v_str(),
+        "title": _v_str(),
+        "fullTitle": _v_str(),
+        "summary": _v_str(),
+        "relations": _v_list(_v_object({"label": _v_str(), "desc": _v_str()}), n_relations, n_relations),
+        "analysis": _v_object({"strategic": _v_list(_v_str(), n_strategic, n_strategic)}),
+        "investment": _v_object({"asset": _v_str(), "thesis": _v_str()}),
+    })
+
+
 # ============== LLM 分析器（OpenAI 兼容）==============
 class LLMAnalyzer:
-    def __init__(self, api_key: str, base_url: str, model: str):
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
-        self.model = model
+    SYSTEM_PROMPT = "你是 NEXUS-9，顶级金融情报分析系统。严格按要求输出 JSON。"
+    TRANSLATE_SYSTEM_PROMPT = "你是专业金融翻译。只翻译给定 JSON 中的字符串值，结构和 key 保持不变，严格输出 JSON。"
+    TOKENS_PER_ITEM = 800  # 原 15 条 / 12000 tokens 的预算
+    # 译文预算按原文长度估算：字符→token 系数，以及同样内容在各语言下相对英文的 token 量
+    # max_tokens 只是上限、按实际输出计费，宁可放宽；省钱靠便宜模型而不是压预算
+    TOKENS_PER_CHAR = {"zh": 1.2, "en": 0.3, "es": 0.35}
+    TOKEN_DENSITY = {"zh": 1.3, "en": 1.0, "es": 1.3}
+    LANG_NAMES = {"zh": "中文（简体）", "en": "English", "es": "Español"}
+
+    def __init__(self, router: LLMRouter):
+        self.router = router
 
     def analyze_batch(self, articles: List[Dict[str, Any]], lang: str = "en") -> List[Dict[str, Any]]:
         if not articles:
             return []
 
-        prompt = self._build_prompt(articles, lang)
+        # 每条新闻一个回显键，输出按键对齐而不是按位置
+        keyed = {f"A{i + 1}": a for i, a in enumerate(articles)}
+        print(f"  🤖 分析 {len(articles)} 条 ({lang})...")
+        results, received = self._generate(
+            list(keyed),
+            lambda keys, feedback: self._build_prompt([(k, keyed[k]) for k in keys], lang, feedback),
+            validate_intel_item,
+            lang,
+        )
+
+        data = []
+        for key, article in keyed.items():
+            item = results.get(key)
+            if item is None:
+                continue
+            item.pop("key", None)
+            cat = article["category"]
+            item["id"] = f"NEX-{random.randint(1000, 9999)}"
+            item["category"] = cat
+            item["category_label"] = article.get("category_label", "")
+            keywords = IMAGE_KEYWORDS.get(cat, IMAGE_KEYWORDS["market"])
+            item["image"] = self._get_unsplash_image(random.choice(keywords))
+            data.append(item)
+
+        if not received:
+            print(f"  ❌ 所有 LLM 端点均无响应，{len(articles)} 条未分析 ({lang})")
+        elif len(data) < len(articles):
+            print(f"  ⚠️  {len(articles) - len(data)} 条重试后仍无效，已丢弃 ({lang})")
+        print(f"  ✅ {len(data)} 条情报 ({lang})")
+        return data
+
+    def translate_batch(self, items: List[Dict[str, Any]], source_lang: str, lang: str) -> List[Dict[str, Any]]:
+        """枢轴模式：只翻译文本字段，impactLevel / confidence / investment.action 等结构化字段原样共享"""
+        if not items:
+            return []
+
+        keyed = {f"A{i + 1}": item for i, item in enumerate(items)}
+        texts = {key: self._text_fields(key, item) for key, item in keyed.items()}
+        print(f"  🔤 翻译 {len(items)} 条 ({source_lang} → {lang})...")
+        results, received = self._generate(
+            list(keyed),
+            lambda keys, feedback: self._build_translate_prompt([texts[k] for k in keys], source_lang, lang, feedback),
+            lambda item, key: translation_validator(
+                len(texts[key]["relations"]), len(texts[key]["analysis"]["strategic"]),
+            )(item, key),
+            lang,
+            system=self.TRANSLATE_SYSTEM_PROMPT,
+            cheap=True,
+            temperature=0.2,
+            item_tokens=lambda key: self._translate_tokens(texts[key], source_lang, lang),
+        )
+        if not results:
+            print(f"  ❌ 翻译全部失败 ({lang})" if received else f"  ❌ 所有 LLM 端点均无响应，翻译未执行 ({lang})")
+            return []
+
+        data = []
+        for key, item in keyed.items():
+            merged = copy.deepcopy(item)
+            translated = results.get(key)
+            if translated is None:
+                # 译文缺失时保留原文，保证各语言条目一一对应
+                data.append(merged)
+                continue
+            for field in ("title", "fullTitle", "summary"):
+                merged[field] = translated[field]
+            for rel, rel_text in zip(merged["relations"], translated["relations"]):
+                rel["label"], rel["desc"] = rel_text["label"], rel_text["desc"]
+            merged["analysis"]["strategic"] = translated["analysis"]["strategic"]
+            merged["investment"]["asset"] = translated["investment"]["asset"]
+            merged["investment"]["thesis"] = translated["investment"]["thesis"]
+            data.append(merged)
+
+        if len(results) < len(items):
+            print(f"  ⚠️  {len(items) - len(results)} 条翻译失败，保留 {source_lang} 原文 ({lang})")
+        print(f"  ✅ {len(data)} 条情报 ({lang})")
+        return data
+
+    @staticmethod
+    def _text_fields(key: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "key": key,
+            "title": item["title"],
+            "fullTitle": item["fullTitle"],
+            "summary": item["summary"],
+            "relations": [{"label": r["label"], "desc": r["desc"]} for r in item["relations"]],
+            "analysis": {"strategic": item["analysis"]["strategic"]},
+            "investment": {"asset": item["investment"]["asset"], "thesis": item["investment"]["thesis"]},
+        }
+
+    def _translate_tokens(self, text: Dict[str, Any], source_lang: str, lang: str) -> int:
+        source_tokens = len(json.dumps(text, ensure_ascii=False)) * self.TOKENS_PER_CHAR.get(source_lang, 1.2)
+        ratio = self.TOKEN_DENSITY.get(lang, 1.3) / self.TOKEN_DENSITY.get(source_lang, 1.0)
+        return int(source_tokens * ratio * 1.5) + 100
+
+    def _generate(self, keys: List[str], build_prompt, validate, lang: str, system: str = SYSTEM_PROMPT,
+                  cheap: bool = False, temperature: float = 0.7,
+                  item_tokens: Callable[[str], int] = None) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+        """请求 -> 按键对齐 -> 逐条校验；只把缺失/无效的条目带着错误提示重新请求
+
+        返回 (结果, 是否收到过任何模型输出)，便于区分"端点全挂"和"输出不合格"
+        """
+        item_tokens = item_tokens or (lambda key: self.TOKENS_PER_ITEM)
+        results: Dict[str, Dict[str, Any]] = {}
+        feedback: Dict[str, List[str]] = {}
+        todo = list(keys)
+        received = False
+
+        for attempt in range(1 + LLM_REPAIR_ROUNDS):
+            if attempt:
+                print(f"  🔁 重新请求 {len(todo)} 条 ({lang}): {', '.join(todo)}")
+            items = self._request(system, build_prompt(todo, feedback), lang, cheap=cheap, temperature=temperature,
+                                  max_tokens=min(12000, sum(map(item_tokens, todo)) + 400))
+            if items is None:
+                items = []
+            else:
+                received = True
+            feedback = {k: ["缺失（未返回该 key）"] for k in todo}
+
+            for item in items:
+                key = item.get("key") if isinstance(item, dict) else None
+                if not isinstance(key, str) or key not in feedback or key in results:
+                    continue
+                errors = validate(item, key)
+                if errors:
+                    feedback[key] = errors
+                else:
+                    results[key] = item
+                    del feedback[key]
+
+            todo = [k for k in todo if k not in results]
+            if not todo:
+                break
+            if not items:
+                continue
+            for key in todo:
+                print(f"  ⚠️  {key}: {'; '.join(feedback[key][:3])}")
+
+        return results, received
+
+    def _request(self, system: str, prompt: str, lang: str, cheap: bool, **params) -> Optional[List[Any]]:
+        """端点全部失败返回 None；收到输出但解析失败返回 []"""
         try:
-            print(f"  🤖 {self.model} 分析 {len(articles)} 条 ({lang})...")
-            response = self.client.chat.completions.create(
-                model=self.model,
+            result_text = self.router.chat(
                 messages=[
-                    {"role": "system", "content": "你是 NEXUS-9，顶级金融情报分析系统。严格按要求输出 JSON。"},
+                    {"role": "system", "content": system},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.7,
-                max_tokens=12000,
+                cheap=cheap,
+                **params,
             )
+        except Exception as e:
+            print(f"  ❌ LLM 请求失败 ({lang}): {e}")
+            return None
 
-            result_text = response.choices[0].message.content
+        try:
             if "```json" in result_text:
                 result_text = result_text.split("```json")[1].split("```")[0]
             elif "```" in result_text:
                 result_text = result_text.split("```")[1].split("```")[0]
 
             data = json.loads(result_text.strip())
-
-            for i, item in enumerate(data):
-                cat = articles[i]["category"] if i < len(articles) else "market"
-                item["id"] = f"NEX-{random.randint(1000, 9999)}"
-                item["category"] = cat
-                item["category_label"] = articles[i].get("category_label", "") if i < len(articles) else ""
-                keywords = IMAGE_KEYWORDS.get(cat, IMAGE_KEYWORDS["market"])
-                item["image"] = self._get_unsplash_image(random.choice(keywords))
-
-            print(f"  ✅ {len(data)} 条情报 ({lang})")
+            if not isinstance(data, list):
+                raise ValueError(f"expected JSON array, got {type(data).__name__}")
             return data
 
         except Exception as e:
-            print(f"  ❌ LLM 失败 ({lang}): {e}")
+            print(f"  ❌ LLM 输出无法解析 ({lang}): {e}")
             return []
 
-    def _build_prompt(self, articles: List[Dict[str, Any]], lang: str) -> str:
-        lang_map = {"zh": "中文（简体）", "en": "English", "es": "Español"}
-        target_lang = lang_map.get(lang, "English")
+    def _build_translate_prompt(self, texts: List[Dict[str, Any]], source_lang: str, lang: str,
+                                feedback: Dict[str, List[str]] = None) -> str:
+        source = self.LANG_NAMES.get(source_lang, "English")
+        target_lang = self.LANG_NAMES.get(lang, "English")
+
+        retry_note = ""
+        if feedback:
+            issues = "\n".join(f"- {k}: {'; '.join(errs[:5])}" for k, errs in feedback.items())
+            retry_note = f"\n🔁 以下条目上次输出不合格，请修正后重新翻译：\n{issues}\n"
+
+        return f"""把下列金融情报从 {source} 翻译成 {target_lang}。
+{retry_note}
+⚠️ 约束：只翻译字符串值；key 原样回显；字段、数组长度与顺序保持不变；股票代码等标的名称可保留原文；数组长度 = {len(texts)}
+
+```json
+{json.dumps(texts, ensure_ascii=False)}
+```
+
+直接输出 JSON 数组：
+"""
+
+    def _build_prompt(self, articles: List[Any], lang: str, feedback: Dict[str, List[str]] = None) -> str:
+        target_lang = self.LANG_NAMES.get(lang, "English")
 
         news_list = "\n".join([
-            f"{i+1}. [{a.get('category_label', '')}] {a['title']} - {a['description'][:150]}"
-            for i, a in enumerate(articles)
+            f"[{key}] [{a.get('category_label', '')}] {a['title']} - {a['description'][:150]}"
+            for key, a in articles
         ])
 
+        retry_note = ""
+        if feedback:
+            issues = "\n".join(f"- {k}: {'; '.join(errs[:5])}" for k, errs in feedback.items())
+            retry_note = f"\n🔁 以下条目上次输出不合格，请修正后重新生成：\n{issues}\n"
+
         return f"""你是 NEXUS-9 金融情报分析系统。分析以下新闻并生成 JSON 格式报告。
 
-📰 新闻列表（共 {len(articles)} 条）：
+📰 新闻列表（共 {len(articles)} 条，方括号内为编号）：
 {news_list}
-
+{retry_note}
 🎯 任务：为每条新闻生成情报对象，使用 {target_lang}，直接返回 JSON 数组。
 
 📋 JSON 结构：
 ```json
 [
   {{
+    "key": "新闻编号，原样回显（如 A1）",
     "title": "简短标题（15字内）",
     "fullTitle": "完整标题（25字内）",
     "classification": "TOP SECRET | CONFIDENTIAL | RESTRICTED | UNCLASSIFIED",
@@ -367,7 +1179,7 @@ class LLMAnalyzer:
 ]
 ```
 
-⚠️ 约束：relations 3-5个，strategic 2条，confidence 80-98，数组长度 = {len(articles)}，语言 {target_lang}
+⚠️ 约束：每条必须回显 key，relations 3-5个，strategic 2条，confidence 80-98，数组长度 = {len(articles)}，语言 {target_lang}
 
 直接输出 JSON：
 """
@@ -511,40 +1323,134 @@ class GmailNotifier:
             return False
 
 
-# ============== 主函数 ==============
-def main():
-    print("=" * 60)
-    print(f"🔮 NEXUS INTEL v2 — {LLM_MODEL} + 多源 + 推送")
-    print(f"📅 {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')}")
-    print("=" * 60)
+# ============== 运行检查点 ==============
+class RunCheckpoint:
+    """单次运行的阶段产物：<STATE_DIR>/runs/<run_id>/<name>.json，崩溃后可从断点续跑"""
 
-    if not LLM_API_KEY:
-        print("❌ LLM_API_KEY 未设置")
-        return
+    def __init__(self, run_id: str = None):
+        self.run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        self.dir = os.path.join(RUNS_DIR, self.run_id)
+
+    @staticmethod
+    def list_runs() -> List[str]:
+        if not os.path.isdir(RUNS_DIR):
+            return []
+        return sorted(d for d in os.listdir(RUNS_DIR) if os.path.isdir(os.path.join(RUNS_DIR, d)))
+
+    @staticmethod
+    def prune(keep: int = RUNS_KEEP) -> None:
+        import shutil
+
+        for run_id in RunCheckpoint.list_runs()[:-keep]:
+            shutil.rmtree(os.path.join(RUNS_DIR, run_id), ignore_errors=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, f"{name}.json")
+
+    def has(self, name: str) -> bool:
+        return os.path.exists(self._path(name))
+
+    def load(self, name: str) -> Any:
+        return load_json_file(self._path(name), None)
+
+    def save(self, name: str, data: Any) -> None:
+        save_json_file(self._path(name), data)
+
+    def clear(self, name: str) -> None:
+        if self.has(name):
+            os.remove(self._path(name))
 
-    # 1. 多源抓取
+
+# ============== 流水线阶段 ==============
+STAGES = ["fetch", "analyze", "write", "notify"]
+LANGUAGES = ["zh", "en", "es"]
+
+
+def stage_complete(ckpt: RunCheckpoint, stage: str) -> bool:
+    if stage == "analyze":
+        return all(ckpt.has(f"analyze_{lang}") for lang in LANGUAGES)
+    if stage == "notify":
+        status = ckpt.load("notify")
+        return status is not None and "failed" not in status.values()
+    return ckpt.has(stage)
+
+
+def clear_stage(ckpt: RunCheckpoint, stage: str) -> None:
+    if stage == "analyze":
+        for lang in LANGUAGES:
+            ckpt.clear(f"analyze_{lang}")
+    else:
+        ckpt.clear(stage)
+
+
+def run_fetch(ckpt: RunCheckpoint, health: SourceHealth) -> bool:
     print("\n📡 Step 1: 多源新闻抓取")
-    aggregator = NewsAggregator()
-    articles = aggregator.fetch_all()
+    articles = NewsAggregator(health, FeedRegistry()).fetch_all()
 
     if not articles:
         print("❌ 无法获取任何新闻")
-        return
+        return False
+    ckpt.save("fetch", articles)
+    return True
 
-    # 2. LLM 多语言分析
-    print(f"\n🧠 Step 2: {LLM_MODEL} AI 分析")
-    analyzer = LLMAnalyzer(LLM_API_KEY, LLM_BASE_URL, LLM_MODEL)
 
-    all_data: Dict[str, List] = {}
-    for lang in ["zh", "en", "es"]:
+def run_analyze(ckpt: RunCheckpoint, health: SourceHealth) -> bool:
+    articles = ckpt.load("fetch")
+    if not articles:
+        print("❌ 缺少 fetch 检查点")
+        return False
+
+    endpoints = []
+    for ep in load_llm_endpoints():
+        if ep["api_key"]:
+            endpoints.append(ep)
+        else:
+            print(f"⚠️  LLM 端点 {ep['name']} 缺少 API key，已跳过")
+    if not endpoints:
+        print("❌ LLM_API_KEY / LLM_ENDPOINTS 未设置")
+        return False
+
+    router = LLMRouter(endpoints, health)
+    pivot = LLM_PIVOT and PIVOT_LANG in LANGUAGES
+    print(f"\n🧠 Step 2: AI 分析（{router.describe()}）" + (f" | 枢轴模式: {PIVOT_LANG}" if pivot else ""))
+    analyzer = LLMAnalyzer(router)
+
+    # 枢轴模式下基准语言必须先分析，其余语言由它翻译
+    order = [PIVOT_LANG] + [lang for lang in LANGUAGES if lang != PIVOT_LANG] if pivot else LANGUAGES
+    for lang in order:
+        if ckpt.has(f"analyze_{lang}"):
+            print(f"\n⏭️  {lang} 已有检查点，跳过")
+            continue
         print(f"\n🌐 生成 {lang} 数据...")
-        all_data[lang] = analyzer.analyze_batch(articles, lang)
-
-    if not any(all_data.values()):
+        if pivot and lang != PIVOT_LANG:
+            base = ckpt.load(f"analyze_{PIVOT_LANG}")
+            if not base:
+                print(f"  ⏭️  {PIVOT_LANG} 基准分析缺失，无法翻译")
+                continue
+            data = analyzer.translate_batch(base, PIVOT_LANG, lang)
+        else:
+            data = analyzer.analyze_batch(articles, lang)
+        if data:
+            ckpt.save(f"analyze_{lang}", data)
+    router.close()
+    health.save()
+
+    missing = [lang for lang in LANGUAGES if not ckpt.has(f"analyze_{lang}")]
+    if len(missing) == len(LANGUAGES):
         print("❌ 所有语言分析失败")
-        return
+        return False
+    if missing:
+        print(f"⚠️  {', '.join(missing)} 分析失败，可用 --resume {ckpt.run_id} 补跑")
+    return True
+
+
+def run_write(ckpt: RunCheckpoint) -> bool:
+    articles = ckpt.load("fetch")
+    all_data = {lang: ckpt.load(f"analyze_{lang}") or [] for lang in LANGUAGES}
+    if not articles or not any(all_data.values()):
+        print("❌ 缺少 fetch / analyze 检查点")
+        return False
 
-    # 3. 保存
     print("\n💾 Step 3: 保存数据")
     os.makedirs("public", exist_ok=True)
 
@@ -568,27 +1474,123 @@ def main():
 
     with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
         json.dump(output_data, f, ensure_ascii=False, indent=2)
+    ckpt.save("write", output_data)
 
     print(f"✅ 已保存 {OUTPUT_PATH}")
     print(f"   分类: {cat_stats}")
+    return True
+
+
+def run_notify(ckpt: RunCheckpoint) -> bool:
+    output_data = ckpt.load("write")
+    if not output_data:
+        print("❌ 缺少 write 检查点")
+        return False
 
-    # 4. 推送通知
     print("\n📲 Step 4: 推送通知")
-    zh_data = all_data.get("zh", [])
+    zh_data = output_data["languages"].get("zh", [])
     if not zh_data:
         print("⚠️  中文数据为空，跳过推送")
+        ckpt.save("notify", {})
+        return True
+
+    # 已成功的渠道不重复推送；Gmail 优先，Telegram 备用
+    status = ckpt.load("notify") or {}
+    notifiers = {
+        "gmail": GmailNotifier(GMAIL_ADDRESS, GMAIL_APP_PASSWORD, GMAIL_TO),
+        "telegram": TelegramNotifier(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID),
+    }
+    for channel, notifier in notifiers.items():
+        if status.get(channel) == "sent":
+            print(f"⏭️  {channel} 已推送，跳过")
+        elif not notifier.enabled:
+            status[channel] = "disabled"
+        else:
+            status[channel] = "sent" if notifier.send(zh_data) else "failed"
+    ckpt.save("notify", status)
+    return "failed" not in status.values()
+
+
+def run_pipeline(ckpt: RunCheckpoint, stages: List[str]) -> bool:
+    health = SourceHealth()
+    runners = {
+        "fetch": lambda: run_fetch(ckpt, health),
+        "analyze": lambda: run_analyze(ckpt, health),
+        "write": lambda: run_write(ckpt),
+        "notify": lambda: run_notify(ckpt),
+    }
+    for stage in stages:
+        if not runners[stage]():
+            print(f"\n⛔ 阶段 {stage} 未完成 — 修复后运行: python {os.path.basename(__file__)} --resume {ckpt.run_id}")
+            return False
+    return True
+
+
+# ============== 主函数 ==============
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="NexusIntel 新闻自动更新")
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="RUN_ID",
+                        help="从第一个未完成阶段继续（默认最近一次运行）")
+    parser.add_argument("--stage", choices=STAGES, help="从某个阶段起重跑（下游阶段随之重跑；notify 只补推未成功的渠道）")
+    parser.add_argument("--run-id", help="--resume / --stage 作用的运行 ID（默认最近一次）")
+    parser.add_argument("--list-runs", action="store_true", help="列出已有运行及阶段状态")
+    parser.add_argument("--import-opml", metavar="FILE", help="把 OPML 中的 feed 导入源注册表后退出")
+    parser.add_argument("--category", help="--import-opml 时统一指定分类（默认按 OPML 文件夹名匹配）")
+    args = parser.parse_args()
+
+    if args.import_opml:
+        registry = FeedRegistry()
+        registry.import_opml(args.import_opml, args.category)
+        registry.save()
+        return
+
+    if args.list_runs:
+        for run_id in RunCheckpoint.list_runs():
+            ckpt = RunCheckpoint(run_id)
+            print(f"{run_id}  " + "  ".join(f"{s}:{'✅' if stage_complete(ckpt, s) else '—'}" for s in STAGES))
+        return
+
+    print("=" * 60)
+    endpoints = load_llm_endpoints()
+    print(f"🔮 NEXUS INTEL v2 — {' / '.join(ep['model'] for ep in endpoints)} + 多源 + 推送")
+    print(f"📅 {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')}")
+
+    existing = args.resume or args.stage or args.run_id
+    if existing:
+        run_id = args.run_id or (args.resume if args.resume not in (None, "latest") else None)
+        run_id = run_id or (RunCheckpoint.list_runs() or [None])[-1]
+        if not run_id or not os.path.isdir(os.path.join(RUNS_DIR, run_id)):
+            print(f"❌ 找不到可恢复的运行: {run_id or '(无)'}")
+            return
+        ckpt = RunCheckpoint(run_id)
+        if args.stage:
+            # 重跑某阶段时其下游检查点都已过期，一并清掉重跑；只重跑 notify 时保留各渠道已推送状态
+            stages = STAGES[STAGES.index(args.stage):]
+            for stage in stages:
+                if stage != "notify" or args.stage != "notify":
+                    clear_stage(ckpt, stage)
+        else:
+            pending = [s for s in STAGES if not stage_complete(ckpt, s)]
+            stages = STAGES[STAGES.index(pending[0]):] if pending else []
     else:
-        # Gmail 优先
-        gmail = GmailNotifier(GMAIL_ADDRESS, GMAIL_APP_PASSWORD, GMAIL_TO)
-        if gmail.enabled:
-            gmail.send(zh_data)
-        # Telegram 备用
-        telegram = TelegramNotifier(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
-        if telegram.enabled:
-            telegram.send(zh_data)
+        if not any(ep["api_key"] for ep in endpoints):
+            print("❌ LLM_API_KEY / LLM_ENDPOINTS 未设置")
+            return
+        RunCheckpoint.prune()
+        ckpt = RunCheckpoint()
+        stages = STAGES
+
+    print(f"🆔 运行 {ckpt.run_id} | 阶段: {' → '.join(stages) or '(全部已完成)'}")
+    print("=" * 60)
+
+    if not run_pipeline(ckpt, stages):
+        return
 
+    output_data = ckpt.load("write") or {}
     print("\n" + "=" * 60)
-    print(f"✨ 完成！{len(articles)} 条情报，{len(cat_stats)} 个板块")
+    print(f"✨ 完成！{output_data.get('total_articles', 0)} 条情报，{len(output_data.get('categories', {}))} 个板块")
     print("=" * 60)
 
 